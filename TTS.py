@@ -1,8 +1,73 @@
-import ollama
 import pyttsx3
 import time
+import threading
 import speech_recognition as sr
 
+# --- Shared engines (created once, reused by every call) ---
+_engine = None
+_engine_lock = threading.Lock()
+_recognizer = None
+_microphone = None
+_recognizer_lock = threading.Lock()
+
+def _get_engine():
+    """
+    Return the shared pyttsx3 engine, creating it on first use (call with _engine_lock held)
+    
+    pyttsx3 engines are tied to the thread that created them (sapi5 needs COM
+    initialised there, nsss its run loop), so create and use the engine from
+    one thread only -- in navigation, the TTS worker thread.
+    """
+    global _engine
+    if _engine is None:
+        _engine = pyttsx3.init()
+        _engine.setProperty('rate', 150)  # Speed of speech
+        _engine.setProperty('volume', 0.9)  # Volume level (0.0 to 1.0)
+    return _engine
+
+def _get_recognizer():
+    """Return the shared recognizer and microphone, calibrated for ambient noise on first use"""
+    global _recognizer, _microphone
+    with _recognizer_lock:
+        if _recognizer is None:
+            recognizer = sr.Recognizer()
+            microphone = sr.Microphone()
+            with microphone as source:
+                recognizer.adjust_for_ambient_noise(source, duration=1)
+            _recognizer, _microphone = recognizer, microphone
+        return _recognizer, _microphone
+
+def warm_up_engine():
+    """
+    Load the TTS engine ahead of time, so the first prompt doesn't pay the
+    start-up cost. Call it on the thread that will later call say().
+    
+    Returns:
+        bool: True if successful, False if error occurred
+    """
+    try:
+        with _engine_lock:
+            _get_engine()
+        return True
+    except Exception as e:
+        print(f"TTS warm-up error: {e}")
+        return False
+
+def warm_up_microphone():
+    """
+    Calibrate the microphone ahead of time, so the first voice answer doesn't
+    pay the start-up cost. Safe to call from any thread.
+    
+    Returns:
+        bool: True if successful, False if error occurred
+    """
+    try:
+        _get_recognizer()
+        return True
+    except Exception as e:
+        print(f"Microphone warm-up error: {e}")
+        return False
+
 # --- Part 1: Simple TTS function for basic text-to-speech ---
 def say(text):
     """
@@ -16,16 +81,12 @@ def say(text):
         bool: True if successful, False if error occurred
     """
     try:
-        # Initialize pyttsx3 TTS engine
-        engine = pyttsx3.init()
-        
-        # Set properties (optional)
-        engine.setProperty('rate', 150)  # Speed of speech
-        engine.setProperty('volume', 0.9)  # Volume level (0.0 to 1.0)
-        
-        # Speak the text
-        engine.say(text)
-        engine.runAndWait()
+        with _engine_lock:
+            engine = _get_engine()
+            
+            # Speak the text
+            engine.say(text)
+            engine.runAndWait()
         
         return True
         
@@ -40,6 +101,9 @@ def get_ollama_response(prompt):
     from the local Ollama streaming API.
     """
     try:
+        # Imported here so navigation, which only needs say(), doesn't load ollama
+        import ollama
+        
         # Use ollama.chat with stream=True
         response = ollama.chat(
             model="gemma:2b", # Using the downloaded model
@@ -106,26 +170,25 @@ def speak_with_ollama(prompt):
         return False
 
 # --- Part 4: Speech Recognition Functions ---
-def listen_for_input(timeout=10, phrase_time_limit=5):
+def listen_for_input(timeout=10, phrase_time_limit=5, pause_threshold=0.8):
     """
     Listen for voice input and return the recognized text.
     
     Args:
         timeout (int): Maximum time to wait for speech to start
         phrase_time_limit (int): Maximum time to listen for a complete phrase
+        pause_threshold (float): Seconds of silence that end the phrase; lower
+            values stop recording (and start recognition) sooner after short answers
         
     Returns:
         str: Recognized text, or None if no speech detected or error occurred
     """
     try:
-        # Initialize recognizer
-        recognizer = sr.Recognizer()
-        microphone = sr.Microphone()
-        
-        # Adjust for ambient noise
-        with microphone as source:
-            print("🎤 Adjusting for ambient noise...")
-            recognizer.adjust_for_ambient_noise(source, duration=1)
+        # Shared recognizer, calibrated for ambient noise once (the energy
+        # threshold keeps adapting while listening)
+        recognizer, microphone = _get_recognizer()
+        recognizer.pause_threshold = pause_threshold
+        recognizer.non_speaking_duration = min(0.5, pause_threshold)
         
         print(f"🎤 Listening for {timeout} seconds...")
         
@@ -153,22 +216,25 @@ def listen_for_input(timeout=10, phrase_time_limit=5):
         print(f"🎤 Unexpected error: {e}")
         return None
 
-def get_yes_no_confirmation(question, timeout=10):
+def get_yes_no_confirmation(question, timeout=10, ask=say):
     """
     Ask a yes/no question and get voice confirmation.
     
     Args:
         question (str): The question to ask
         timeout (int): Maximum time to wait for response
+        ask (callable): Speaks the question and returns once it has been
+            spoken; pass the owner's speak function when another thread
+            drives the TTS engine
         
     Returns:
         bool: True for yes, False for no, None if no valid response
     """
     # Speak the question
-    say(question)
+    ask(question)
     
-    # Listen for response
-    response = listen_for_input(timeout=timeout, phrase_time_limit=3)
+    # Listen for response (a one-word answer, so end the phrase on a short pause)
+    response = listen_for_input(timeout=timeout, phrase_time_limit=3, pause_threshold=0.5)
     
     if response is None:
         return None
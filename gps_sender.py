@@ -7,13 +7,17 @@ Sends GPS coordinates to localhost server for Raspberry Pi navigation
 import requests
 import time
 import json
+import random
 import sys
+import logging
 from typing import Optional, Tuple
 import geocoder
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import threading
-import urllib.parse
-import webbrowser
+from text_maps import TextMaps, get_shared_session
+from network_utils import configure_logging
+
+
+# Details of each update sent or skipped, shown with --verbose
+logger = logging.getLogger('gps_sender')
 
 
 class GPSSender:
@@ -28,6 +32,16 @@ class GPSSender:
         """
         self.server_url = server_url
         self.update_interval = 5  # Send coordinates every 5 seconds
+        # Resend an unchanged location this often so the server's copy never
+        # goes stale (the navigator warns once a fix is over 30 seconds old)
+        self.heartbeat_interval = 20
+        # Movement smaller than this is treated as GPS jitter and not sent
+        self.min_move_meters = 10
+        # Longest wait between retries while the server is unreachable
+        self.max_backoff = 300
+        self.navigator = TextMaps()
+        # Keep-alive connection to the server, reused by every send
+        self.session = get_shared_session()
         
     def get_gps_location_from_browser(self) -> Optional[Tuple[float, float]]:
         """
@@ -36,82 +50,11 @@ class GPSSender:
         Returns:
             Tuple of (latitude, longitude) or None if not found
         """
-        try:
-            location_data = {'lat': None, 'lon': None, 'received': False}
-            
-            class LocationHandler(BaseHTTPRequestHandler):
-                def log_message(self, format, *args):
-                    pass  # Suppress logging
-                
-                def do_GET(self):
-                    if self.path == '/':
-                        # Serve HTML page with geolocation
-                        html = '''
-                        <!DOCTYPE html>
-                        <html>
-                        <head><title>GPS Location Sender</title></head>
-                        <body>
-                        <h2>📍 GPS Location Sender</h2>
-                        <p id="status">Requesting location permission...</p>
-                        <p>This will send your location to the Raspberry Pi navigation system.</p>
-                        <script>
-                        if (navigator.geolocation) {
-                            navigator.geolocation.getCurrentPosition(
-                                function(position) {
-                                    document.getElementById('status').textContent = 'Location acquired! Sending to server...';
-                                    fetch('/location?lat=' + position.coords.latitude + '&lon=' + position.coords.longitude);
-                                },
-                                function(error) {
-                                    document.getElementById('status').textContent = 'Error: ' + error.message;
-                                },
-                                {enableHighAccuracy: true, timeout: 10000}
-                            );
-                        } else {
-                            document.getElementById('status').textContent = 'Geolocation not supported';
-                        }
-                        </script>
-                        </body>
-                        </html>
-                        '''
-                        self.send_response(200)
-                        self.send_header('Content-type', 'text/html')
-                        self.end_headers()
-                        self.wfile.write(html.encode())
-                    elif self.path.startswith('/location'):
-                        # Parse location data
-                        query = urllib.parse.urlparse(self.path).query
-                        params = urllib.parse.parse_qs(query)
-                        if 'lat' in params and 'lon' in params:
-                            location_data['lat'] = float(params['lat'][0])
-                            location_data['lon'] = float(params['lon'][0])
-                            location_data['received'] = True
-                        self.send_response(200)
-                        self.end_headers()
-            
-            # Start server in background
-            server = HTTPServer(('localhost', 8889), LocationHandler)
-            thread = threading.Thread(target=server.serve_forever)
-            thread.daemon = True
-            thread.start()
-            
-            # Open browser
-            print("🌐 Opening browser to get your precise GPS location...")
-            print("   Please allow location access when prompted.")
-            webbrowser.open('http://localhost:8889')
-            
-            # Wait for location (max 30 seconds)
-            for _ in range(60):
-                if location_data['received']:
-                    server.shutdown()
-                    return (location_data['lat'], location_data['lon'])
-                time.sleep(0.5)
-            
-            server.shutdown()
-            return None
-            
-        except Exception as e:
-            print(f"⚠️  Error getting browser location: {e}")
-            return None
+        # Port 8889 so the page doesn't clash with text_maps running on the same computer
+        return self.navigator.get_current_location_from_browser(
+            port=8889,
+            note="This will send your location to the Raspberry Pi navigation system."
+        )
     
     def get_current_location(self) -> Optional[Tuple[float, float]]:
         """
@@ -155,14 +98,14 @@ class GPSSender:
                 'timestamp': time.time()
             }
             
-            response = requests.post(
+            response = self.session.post(
                 f"{self.server_url}/location",
                 json=data,
                 timeout=5
             )
             
             if response.status_code == 200:
-                print(f"✅ Sent location: {lat:.4f}, {lon:.4f}")
+                logger.info("✅ Sent location: %.4f, %.4f", lat, lon)
                 return True
             else:
                 print(f"❌ Failed to send location: {response.status_code}")
@@ -177,13 +120,16 @@ class GPSSender:
     
     def run_continuous_sending(self):
         """Continuously send GPS coordinates to server"""
-        print(f"\n{'='*60}")
-        print(f"📡 GPS LOCATION SENDER")
-        print(f"{'='*60}")
-        print(f"🖥️  Computer GPS → Raspberry Pi Navigation")
-        print(f"🔄 Update interval: {self.update_interval} seconds")
-        print(f"🌐 Server URL: {self.server_url}")
-        print(f"{'='*60}\n")
+        banner = "\n".join([
+            f"\n{'='*60}",
+            "📡 GPS LOCATION SENDER",
+            f"{'='*60}",
+            "🖥️  Computer GPS → Raspberry Pi Navigation",
+            f"🔄 Update interval: {self.update_interval} seconds",
+            f"🌐 Server URL: {self.server_url}",
+            f"{'='*60}\n",
+        ])
+        print(banner)
         
         # Get initial location
         print("📍 Getting initial GPS location...")
@@ -195,7 +141,8 @@ class GPSSender:
         lat, lon = location
         print(f"✅ Initial location: {lat:.4f}, {lon:.4f}")
         
-        # Test server connection
+        # Test server connection (this also opens the session's connection
+        # ahead of the continuous sends)
         print(f"\n🔗 Testing connection to server...")
         if not self.send_location(lat, lon):
             print("❌ Could not connect to server. Please make sure the server is running on the Raspberry Pi.")
@@ -205,30 +152,56 @@ class GPSSender:
         print(f"\n🚀 Starting continuous GPS sending...")
         print("Press Ctrl+C to stop\n")
         
+        last_sent_location = location
+        last_sent_time = time.monotonic()
+        send_failures = 0
+        stationary_ticks = 0
+        
         try:
             iteration = 0
             while True:
                 iteration += 1
                 
                 # Get current location
-                print(f"\n🔄 Update #{iteration} - Getting current location...")
+                logger.info("\n🔄 Update #%d - Getting current location...", iteration)
                 location = self.get_current_location()
                 
                 if location:
                     lat, lon = location
-                    print(f"📍 Current location: {lat:.4f}, {lon:.4f}")
+                    logger.info("📍 Current location: %.4f, %.4f", lat, lon)
                     
-                    # Send to server
-                    if self.send_location(lat, lon):
-                        print("✅ Location sent successfully")
+                    # Only send if we've moved noticeably or the heartbeat is due
+                    moved = not self.navigator.is_within_distance(last_sent_location, location, self.min_move_meters)
+                    should_send = (moved or
+                                   time.monotonic() - last_sent_time >= self.heartbeat_interval)
+                    
+                    stationary_ticks = 0 if moved else stationary_ticks + 1
+                    
+                    if not should_send:
+                        logger.info("📍 Moved less than %d m, not sending", self.min_move_meters)
+                    elif self.send_location(lat, lon):
+                        logger.info("✅ Location sent successfully")
+                        last_sent_location = location
+                        last_sent_time = time.monotonic()
+                        send_failures = 0
                     else:
                         print("⚠️  Failed to send location")
+                        send_failures += 1
                 else:
                     print("⚠️  Could not get current location")
                 
-                # Wait before next update
-                print(f"⏳ Next update in {self.update_interval} seconds...")
-                time.sleep(self.update_interval)
+                # Wait before next update, backing off (with jitter) while the
+                # server keeps failing so an outage isn't hammered every tick
+                sleep_for = self.update_interval
+                if send_failures:
+                    sleep_for = min(self.max_backoff, self.update_interval * 2 ** min(send_failures, 6))
+                    sleep_for *= random.uniform(0.5, 1.5)
+                elif stationary_ticks:
+                    # Standing still: check less often, but never past the
+                    # heartbeat so the server's copy stays fresh
+                    sleep_for = min(self.heartbeat_interval, self.update_interval * 2 ** min(stationary_ticks, 4))
+                logger.info("⏳ Next update in %.0f seconds...", sleep_for)
+                time.sleep(sleep_for)
                 
         except KeyboardInterrupt:
             print("\n\n⏹️  GPS sending stopped by user")
@@ -241,10 +214,15 @@ def main():
     print("📡 COMPUTER GPS SENDER")
     print("="*60 + "\n")
     
+    args = sys.argv[1:]
+    
+    # Per-update status lines are only shown with --verbose
+    args = configure_logging(args)
+    
     # Check if server URL is provided as argument
     server_url = "http://localhost:5000"
-    if len(sys.argv) > 1:
-        server_url = sys.argv[1]
+    if len(args) > 0:
+        server_url = args[0]
         print(f"🌐 Using custom server URL: {server_url}")
     else:
         print(f"🌐 Using default server URL: {server_url}")
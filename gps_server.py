@@ -5,10 +5,18 @@ Receives GPS coordinates from computer and serves them to navigation system
 """
 
 from flask import Flask, request, jsonify
+import sys
 import time
+import math
+import logging
 import threading
 from typing import Optional, Tuple
 import json
+from network_utils import get_local_ip, configure_logging
+
+
+# One line per location received, shown with --verbose
+logger = logging.getLogger('gps_server')
 
 
 class GPSServer:
@@ -25,7 +33,12 @@ class GPSServer:
         self.port = port
         self.current_location = None
         self.last_update = None
+        # Local monotonic time the last location arrived, for computing its age
+        self.last_received = None
         self.lock = threading.Lock()
+        # Signalled whenever a new location arrives, so GET /location can long-poll
+        self.location_updated = threading.Condition(self.lock)
+        self.max_wait_seconds = 30
         
         # Setup routes
         self.setup_routes()
@@ -44,13 +57,27 @@ class GPSServer:
                 
                 lat = float(data['latitude'])
                 lon = float(data['longitude'])
-                timestamp = data.get('timestamp', time.time())
+                
+                # The timestamp is the long-poll cursor (compared with ?since=),
+                # so it must be a real number; a missing or null one means now
+                timestamp = data.get('timestamp')
+                if timestamp is None:
+                    timestamp = time.time()
+                else:
+                    try:
+                        timestamp = float(timestamp)
+                    except (TypeError, ValueError):
+                        return jsonify({'error': 'Invalid timestamp'}), 400
+                    if not math.isfinite(timestamp):
+                        return jsonify({'error': 'Invalid timestamp'}), 400
                 
                 with self.lock:
                     self.current_location = (lat, lon)
                     self.last_update = timestamp
+                    self.last_received = time.monotonic()
+                    self.location_updated.notify_all()
                 
-                print(f"📍 Received location: {lat:.4f}, {lon:.4f}")
+                logger.info("📍 Received location: %.4f, %.4f", lat, lon)
                 return jsonify({'status': 'success', 'message': 'Location received'})
                 
             except Exception as e:
@@ -59,9 +86,24 @@ class GPSServer:
         
         @self.app.route('/location', methods=['GET'])
         def get_location():
-            """Get current GPS coordinates"""
+            """
+            Get current GPS coordinates
+            
+            With ?since=<timestamp>&wait=<seconds> the request is held until a
+            location newer than `since` arrives (or `wait` expires), so clients
+            get pushed updates instead of polling on a fixed interval.
+            """
             try:
+                since = request.args.get('since', type=float)
+                wait = min(request.args.get('wait', 0, type=float), self.max_wait_seconds)
+                
                 with self.lock:
+                    if since is not None and wait > 0:
+                        self.location_updated.wait_for(
+                            lambda: self.last_update is not None and self.last_update > since,
+                            timeout=wait
+                        )
+                    
                     if self.current_location is None:
                         return jsonify({'error': 'No location available'}), 404
                     
@@ -69,7 +111,7 @@ class GPSServer:
                         'latitude': self.current_location[0],
                         'longitude': self.current_location[1],
                         'timestamp': self.last_update,
-                        'age_seconds': time.time() - self.last_update if self.last_update else None
+                        'age_seconds': self.get_age_seconds()
                     })
                     
             except Exception as e:
@@ -82,10 +124,7 @@ class GPSServer:
             try:
                 with self.lock:
                     has_location = self.current_location is not None
-                    age_seconds = None
-                    
-                    if has_location and self.last_update:
-                        age_seconds = time.time() - self.last_update
+                    age_seconds = self.get_age_seconds()
                     
                     return jsonify({
                         'server_running': True,
@@ -108,6 +147,20 @@ class GPSServer:
         with self.lock:
             return self.current_location
     
+    def get_age_seconds(self) -> Optional[float]:
+        """
+        Seconds since the last location arrived (call with self.lock held)
+        
+        Measured on this device's monotonic clock, so it isn't skewed by the
+        sender's clock or by wall-clock adjustments.
+        
+        Returns:
+            Age in seconds, or None if no location has arrived yet
+        """
+        if self.last_received is None:
+            return None
+        return time.monotonic() - self.last_received
+    
     def is_location_fresh(self, max_age_seconds: int = 30) -> bool:
         """
         Check if location is fresh (not too old)
@@ -118,25 +171,10 @@ class GPSServer:
         Returns:
             bool: True if location is fresh, False otherwise
         """
-        if self.current_location is None or self.last_update is None:
-            return False
-        
-        age = time.time() - self.last_update
-        return age <= max_age_seconds
+        with self.lock:
+            age = self.get_age_seconds()
+        return age is not None and age <= max_age_seconds
     
-    def get_local_ip(self) -> str:
-        """Get the local IP address of this device"""
-        import socket
-        try:
-            # Connect to a remote address to get local IP
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(("8.8.8.8", 80))
-            local_ip = s.getsockname()[0]
-            s.close()
-            return local_ip
-        except:
-            return "localhost"
-
     def run(self, host: str = '0.0.0.0', debug: bool = False):
         """
         Run the GPS server
@@ -146,16 +184,19 @@ class GPSServer:
             debug: Enable Flask debug mode
         """
         # Get the actual IP address for display
-        actual_ip = self.get_local_ip()
+        actual_ip = get_local_ip()
         
-        print(f"\n{'='*60}")
-        print(f"🌐 GPS SERVER STARTING")
-        print(f"{'='*60}")
-        print(f"🖥️  Raspberry Pi GPS Server")
-        print(f"🌐 Server URL: http://{actual_ip}:{self.port}")
-        print(f"📡 Waiting for GPS coordinates from computer...")
-        print(f"💡 Computer should connect to: http://{actual_ip}:{self.port}")
-        print(f"{'='*60}\n")
+        banner = "\n".join([
+            f"\n{'='*60}",
+            "🌐 GPS SERVER STARTING",
+            f"{'='*60}",
+            "🖥️  Raspberry Pi GPS Server",
+            f"🌐 Server URL: http://{actual_ip}:{self.port}",
+            "📡 Waiting for GPS coordinates from computer...",
+            f"💡 Computer should connect to: http://{actual_ip}:{self.port}",
+            f"{'='*60}\n",
+        ])
+        print(banner)
         
         try:
             self.app.run(host=host, port=self.port, debug=debug, threaded=True)
@@ -165,12 +206,35 @@ class GPSServer:
             print(f"\n❌ Server error: {e}")
 
 
+def create_app(port: int = 5000) -> Flask:
+    """
+    WSGI application factory, for running the server under a production
+    server such as Gunicorn instead of Flask's built-in one
+    
+    The location lives in this process's memory, so run a single worker and
+    scale with threads (each long-polling client holds one), e.g.:
+    gunicorn -w 1 --threads 8 -b 0.0.0.0:5000 'gps_server:create_app()'
+    
+    Args:
+        port: Port the server is reachable on (only used for display)
+        
+    Returns:
+        Flask: The configured application
+    """
+    return GPSServer(port=port).app
+
+
 def main():
     """Main function to run GPS server"""
     print("\n" + "="*60)
     print("🌐 RASPBERRY PI GPS SERVER")
     print("="*60 + "\n")
     
+    # Per-request status lines are only shown with --verbose
+    configure_logging(sys.argv[1:])
+    # Keep Flask's startup line and access log, which were always shown
+    logging.getLogger('werkzeug').setLevel(logging.INFO)
+    
     # Create and run server
     server = GPSServer(port=5000)
     server.run(host='0.0.0.0', debug=False)
@@ -5,9 +5,35 @@ Provides real-time turn-by-turn voice directions using GPS updates every 5 secon
 """
 
 import sys
+import re
 import time
-from text_maps import TextMaps
-from TTS import say, get_yes_no_confirmation, listen_for_input
+import queue
+import logging
+import threading
+from text_maps import TextMaps, ARRIVAL_RADIUS_M
+from network_utils import configure_logging
+from TTS import say, get_yes_no_confirmation, listen_for_input, warm_up_engine, warm_up_microphone
+
+
+# Spoken instruction templates keyed by OSRM maneuver type
+SPEECH_TEMPLATES = {
+    'depart': "Head {modifier} on {road} for {distance}",
+    'arrive': "You have arrived at your destination",
+    'turn': "In {distance}, turn {modifier} onto {road}",
+    'merge': "In {distance}, merge {modifier} onto {road}",
+    'roundabout': "In {distance}, at the roundabout, take exit {exit} onto {road}",
+    'fork': "In {distance}, at the fork, keep {modifier} onto {road}",
+}
+DEFAULT_SPEECH_TEMPLATE = "In {distance}, {action} {modifier} onto {road}"
+
+# Split point between sentences, used to stream long announcements
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+')
+
+# Most utterances waiting to be spoken before the oldest are dropped
+TTS_QUEUE_SIZE = 8
+
+# Position and distance details on each update, shown with --verbose
+logger = logging.getLogger('navigation')
 
 
 class LiveVoiceNavigation:
@@ -24,30 +50,117 @@ class LiveVoiceNavigation:
         self.navigator = TextMaps()  # Permanently set to walking
         self.last_spoken_step = -1
         self.update_interval = 5  # Update every 5 seconds
+        self.max_update_interval = 30  # Back off to this while standing still
         self.use_server_gps = use_server_gps
         self.server_url = server_url
         
+        # Background TTS worker so speaking never blocks location updates.
+        # Bounded: if speech backs up, the oldest (stalest) utterances are dropped.
+        # The worker is the only thread that touches the TTS engine
+        self.tts_queue = queue.Queue(maxsize=TTS_QUEUE_SIZE)
+        self.tts_thread = threading.Thread(target=self._tts_worker, daemon=True)
+        self.tts_thread.start()
+        
+        # Load the TTS engine (on the worker, as its first task) and calibrate
+        # the microphone while the user is still choosing a destination
+        self.tts_queue.put(warm_up_engine)
+        self.warm_up_thread = threading.Thread(target=warm_up_microphone, daemon=True)
+        self.warm_up_thread.start()
+        
     def init_tts(self):
         """Initialize TTS engine"""
         print("🔊 Initializing TTS engine...")
+        self.tts_queue.join()
+        self.warm_up_thread.join()
         print("✅ TTS engine ready\n")
     
-    def speak(self, text: str, display: bool = True):
+    def _tts_worker(self):
+        """
+        Speak queued text one utterance at a time, until a None sentinel arrives.
+        Queued callables (engine set-up) are run here too, so the engine is
+        created and used on this thread only
+        """
+        while True:
+            text = self.tts_queue.get()
+            if text is None:
+                self.tts_queue.task_done()
+                break
+            try:
+                if callable(text):
+                    text()
+                else:
+                    say(text)
+            except Exception as e:
+                print(f"⚠️  TTS Error: {e}")
+            finally:
+                self.tts_queue.task_done()
+    
+    def speak(self, text: str, display: bool = True, wait: bool = False):
         """
         Speak text using TTS
         
         Args:
             text: Text to speak
             display: Whether to display the text on screen
+            wait: If True, block until everything queued so far has been spoken
+                  (use before listening for voice input or exiting)
         """
-        try:
-            if display:
-                print(f"\n🔊 SPEAKING: {text}\n")
-            
-            say(text)
-            
-        except Exception as e:
-            print(f"⚠️  TTS Error: {e}")
+        if display:
+            print(f"\n🔊 SPEAKING: {text}\n")
+        
+        self._enqueue_speech(text)
+        
+        if wait:
+            self.tts_queue.join()
+    
+    def speak_sentences(self, text: str, display: bool = True):
+        """
+        Speak multi-sentence text one sentence at a time, so the first
+        sentence starts playing while the rest are still queued
+        
+        Args:
+            text: Text to speak
+            display: Whether to display the text on screen
+        """
+        if display:
+            print(f"\n🔊 SPEAKING: {text}\n")
+        
+        for sentence in SENTENCE_BREAK.split(text):
+            if sentence:
+                self._enqueue_speech(sentence)
+    
+    def _enqueue_speech(self, text: str):
+        """Queue text for the TTS worker, dropping the oldest entry if the queue is full"""
+        # Skip text that is already waiting to be spoken (e.g. an instruction
+        # re-announced while the current step flips back and forth)
+        with self.tts_queue.mutex:
+            if text in self.tts_queue.queue:
+                return
+        
+        while True:
+            try:
+                self.tts_queue.put_nowait(text)
+                return
+            except queue.Full:
+                try:
+                    self.tts_queue.get_nowait()
+                except queue.Empty:
+                    continue
+                self.tts_queue.task_done()
+    
+    def stop_tts(self):
+        """Let queued speech finish, then shut the TTS worker down"""
+        self.tts_queue.put(None)
+        self.tts_thread.join(timeout=10)
+    
+    def clear_speech(self):
+        """Drop queued utterances that have not started playing yet"""
+        while True:
+            try:
+                self.tts_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.tts_queue.task_done()
     
     def confirm_destination(self, destination: str) -> bool:
         """
@@ -72,7 +185,11 @@ class LiveVoiceNavigation:
         for attempt in range(max_attempts):
             print(f"\n🔄 Confirmation attempt {attempt + 1}/{max_attempts}")
             
-            response = get_yes_no_confirmation(confirmation_question, timeout=15)
+            # The question goes through the TTS worker, which owns the engine
+            response = get_yes_no_confirmation(
+                confirmation_question, timeout=15,
+                ask=lambda question: self.speak(question, display=False, wait=True)
+            )
             
             if response is True:
                 print("✅ Destination confirmed!")
@@ -80,14 +197,14 @@ class LiveVoiceNavigation:
                 return True
             elif response is False:
                 print("❌ Destination not confirmed")
-                self.speak("I understand. Please try again with a different destination.")
+                self.speak("I understand. Please try again with a different destination.", wait=True)
                 return False
             else:
                 print("⚠️  Could not understand your response")
                 if attempt < max_attempts - 1:
-                    self.speak("I didn't catch that. Please say yes or no.")
+                    self.speak("I didn't catch that. Please say yes or no.", wait=True)
                 else:
-                    self.speak("I'm having trouble understanding. Please try again later.")
+                    self.speak("I'm having trouble understanding. Please try again later.", wait=True)
                     return False
         
         return False
@@ -106,7 +223,7 @@ class LiveVoiceNavigation:
         print(f"{'='*60}\n")
         
         # Ask for destination
-        self.speak("Please tell me your destination address.")
+        self.speak("Please tell me your destination address.", wait=True)
         
         max_attempts = 3
         for attempt in range(max_attempts):
@@ -120,9 +237,9 @@ class LiveVoiceNavigation:
             else:
                 print("⚠️  No destination heard or destination too short")
                 if attempt < max_attempts - 1:
-                    self.speak("I didn't hear a destination. Please try again.")
+                    self.speak("I didn't hear a destination. Please try again.", wait=True)
                 else:
-                    self.speak("I'm having trouble hearing your destination. Please try again later.")
+                    self.speak("I'm having trouble hearing your destination. Please try again later.", wait=True)
                     return None
         
         return None
@@ -151,21 +268,14 @@ class LiveVoiceNavigation:
             dist_text = f"{km:.1f} kilometers"
         
         # Create natural speech instruction
-        if direction_type == 'depart':
-            return f"Head {modifier} on {instruction} for {dist_text}"
-        elif direction_type == 'arrive':
-            return "You have arrived at your destination"
-        elif direction_type == 'turn':
-            return f"In {dist_text}, turn {modifier} onto {instruction}"
-        elif direction_type == 'merge':
-            return f"In {dist_text}, merge {modifier} onto {instruction}"
-        elif direction_type == 'roundabout':
-            exit_num = maneuver.get('exit', 1)
-            return f"In {dist_text}, at the roundabout, take exit {exit_num} onto {instruction}"
-        elif direction_type == 'fork':
-            return f"In {dist_text}, at the fork, keep {modifier} onto {instruction}"
-        else:
-            return f"In {dist_text}, {direction_type.replace('_', ' ')} {modifier} onto {instruction}"
+        template = SPEECH_TEMPLATES.get(direction_type, DEFAULT_SPEECH_TEMPLATE)
+        return template.format(
+            modifier=modifier,
+            road=instruction,
+            distance=dist_text,
+            exit=maneuver.get('exit', 1),
+            action=direction_type.replace('_', ' ')
+        )
     
     def run_live_navigation(self, destination: str):
         """
@@ -194,7 +304,7 @@ class LiveVoiceNavigation:
         dest_coords = self.navigator.geocode(destination)
         if not dest_coords:
             print(f"❌ Could not find destination: {destination}")
-            self.speak(f"Error: Could not find destination {destination}")
+            self.speak(f"Error: Could not find destination {destination}", wait=True)
             return
 
         print(f"✓ Destination: {dest_coords[0]:.4f}, {dest_coords[1]:.4f}\n")
@@ -210,10 +320,10 @@ class LiveVoiceNavigation:
         if not current_location:
             if self.use_server_gps:
                 print("❌ Could not get location from GPS server")
-                self.speak("Error: Could not get location from GPS server. Make sure the computer is sending GPS coordinates.")
+                self.speak("Error: Could not get location from GPS server. Make sure the computer is sending GPS coordinates.", wait=True)
             else:
                 print("❌ Could not detect current location")
-                self.speak("Error: Could not detect your current location")
+                self.speak("Error: Could not detect your current location", wait=True)
             return
         
         print(f"✓ Current location: {current_location[0]:.4f}, {current_location[1]:.4f}\n")
@@ -224,11 +334,13 @@ class LiveVoiceNavigation:
         
         if not route_data or not route_data.get('routes'):
             print("❌ Could not find a route")
-            self.speak("Error: Could not find a route to your destination")
+            self.speak("Error: Could not find a route to your destination", wait=True)
             return
         
         route = route_data['routes'][0]
         steps = route['legs'][0]['steps']
+        step_coords = self.navigator.get_step_coords(steps)
+        num_steps = len(steps)
         total_distance = route['distance']
         total_duration = route['duration']
         
@@ -238,11 +350,11 @@ class LiveVoiceNavigation:
         print(f"{'='*60}")
         print(f"Total Distance: {self.navigator.format_distance(total_distance)}")
         print(f"Estimated Time: {self.navigator.format_duration(total_duration)}")
-        print(f"Total Steps: {len(steps)}")
+        print(f"Total Steps: {num_steps}")
         print(f"{'='*60}\n")
         
         summary = f"Route calculated. Total distance is {self.navigator.format_distance(total_distance)}. Estimated time is {self.navigator.format_duration(total_duration)}. Starting navigation."
-        self.speak(summary)
+        self.speak_sentences(summary)
         
         print("🚶 Starting live navigation...")
         print("Press Ctrl+C to stop\n")
@@ -250,89 +362,95 @@ class LiveVoiceNavigation:
         
         current_step_idx = 0
         self.last_spoken_step = -1
+        poll_interval = self.update_interval
+        last_location = current_location
         
         try:
             iteration = 0
-            while current_step_idx < len(steps):
+            while current_step_idx < num_steps:
                 iteration += 1
                 
                 # Get fresh GPS location
-                print(f"\n🔄 Update #{iteration} - Getting current location...")
+                logger.info("🔄 Update #%d - Getting current location...", iteration)
                 if self.use_server_gps:
-                    current_location = self.navigator.get_current_location(use_server=True, server_url=self.server_url)
+                    # Long-poll: the server answers as soon as the computer sends a new fix,
+                    # and at the latest after update_interval, so no separate sleep is needed
+                    current_location = self.navigator.get_current_location(use_server=True, server_url=self.server_url, wait=poll_interval)
                 else:
                     current_location = self.navigator.get_current_location()
                 
                 if not current_location:
                     if self.use_server_gps:
-                        print("⚠️  Could not get location from GPS server, retrying...")
+                        logger.warning("⚠️  Could not get location from GPS server, retrying...")
                     else:
-                        print("⚠️  Could not update location, retrying...")
+                        logger.warning("⚠️  Could not update location, retrying...")
                     time.sleep(self.update_interval)
                     continue
                 
-                # Calculate distance to destination
-                distance_to_dest = self.navigator.calculate_distance(current_location, dest_coords)
+                # Poll less often while standing still (within 3 meters of the
+                # last fix), and at the normal rate again as soon as we move
+                if self.navigator.is_within_distance(last_location, current_location, 3):
+                    poll_interval = min(poll_interval * 1.5, self.max_update_interval)
+                else:
+                    poll_interval = self.update_interval
+                last_location = current_location
                 
                 # Check if we've arrived (within 20 meters)
-                if distance_to_dest < 20:
+                if self.navigator.is_within_distance(current_location, dest_coords, ARRIVAL_RADIUS_M):
                     print("\n" + "="*60)
                     print("🎯 YOU HAVE ARRIVED AT YOUR DESTINATION!")
                     print("="*60 + "\n")
-                    self.speak("You have arrived at your destination!")
+                    self.clear_speech()
+                    self.speak("You have arrived at your destination!", wait=True)
                     break
                 
                 # Find current step based on location
-                current_step_idx = self.navigator.find_current_step(current_location, steps)
+                current_step_idx = self.navigator.find_current_step(current_location, steps, step_coords)
                 
                 # Get current step
                 step = steps[current_step_idx]
                 
-                # Calculate distance to next maneuver
-                maneuver_location = step['maneuver']['location']
-                maneuver_coords = (maneuver_location[1], maneuver_location[0])
-                distance_to_maneuver = self.navigator.calculate_distance(current_location, maneuver_coords)
+                # Display current status (distances are only needed for this, so
+                # skip computing them when verbose output is off)
+                if logger.isEnabledFor(logging.INFO):
+                    distance_to_dest = self.navigator.calculate_distance(current_location, dest_coords)
+                    distance_to_maneuver = self.navigator.calculate_distance(current_location, step_coords[current_step_idx])
+                    logger.info("📍 Current Position: %.4f, %.4f", current_location[0], current_location[1])
+                    logger.info("📏 Distance to destination: %s", self.navigator.format_distance(distance_to_dest))
+                    logger.info("📏 Distance to next turn: %s", self.navigator.format_distance(distance_to_maneuver))
                 
-                # Display current status
-                print("\n" + "="*60)
-                print(f"📍 Current Position: {current_location[0]:.4f}, {current_location[1]:.4f}")
-                print(f"📏 Distance to destination: {self.navigator.format_distance(distance_to_dest)}")
-                print(f"📏 Distance to next turn: {self.navigator.format_distance(distance_to_maneuver)}")
-                print(f"\n🧭 CURRENT INSTRUCTION (Step {current_step_idx + 1}/{len(steps)}):")
-                
-                instruction_text = self.format_instruction_for_speech(step)
-                print(f"   {instruction_text}")
-                
-                # Speak instruction if:
-                # 1. We moved to a new step, OR
-                # 2. We're close to the maneuver (within 50 meters) and haven't spoken this step yet
-                should_speak = False
+                # Show and speak the instruction when we move to a new step
                 if current_step_idx != self.last_spoken_step:
-                    should_speak = True
                     if self.last_spoken_step != -1:
                         print(f"\n✅ Completed step {self.last_spoken_step + 1}! Moving to step {current_step_idx + 1}")
-                
-                if should_speak:
+                    
+                    instruction_text = self.format_instruction_for_speech(step)
+                    print("\n" + "="*60)
+                    print(f"🧭 CURRENT INSTRUCTION (Step {current_step_idx + 1}/{num_steps}):")
+                    print(f"   {instruction_text}")
+                    
+                    # Show next instruction if available
+                    if current_step_idx + 1 < num_steps:
+                        next_step = steps[current_step_idx + 1]
+                        next_instruction = self.format_instruction_for_speech(next_step)
+                        print(f"\n⏭️  NEXT:")
+                        print(f"   {next_instruction}")
+                    
+                    print("="*60)
+                    
                     self.speak(instruction_text)
                     self.last_spoken_step = current_step_idx
                 
-                # Show next instruction if available
-                if current_step_idx + 1 < len(steps):
-                    next_step = steps[current_step_idx + 1]
-                    next_instruction = self.format_instruction_for_speech(next_step)
-                    print(f"\n⏭️  NEXT:")
-                    print(f"   {next_instruction}")
-                
-                print("="*60)
-                
-                # Wait before next update
-                print(f"\n⏳ Next update in {self.update_interval} seconds... (Press Ctrl+C to stop)")
-                time.sleep(self.update_interval)
+                # Wait before next update (server GPS already waits inside the long-poll)
+                if not self.use_server_gps:
+                    logger.info("⏳ Next update in %.0f seconds... (Press Ctrl+C to stop)", poll_interval)
+                    time.sleep(poll_interval)
                 
         except KeyboardInterrupt:
             print("\n\n⏹️  Navigation stopped by user")
             print(f"Last known position: {current_location[0]:.4f}, {current_location[1]:.4f}\n")
-            self.speak("Navigation stopped")
+            self.clear_speech()
+            self.speak("Navigation stopped", wait=True)
 
 
 def main():
@@ -346,6 +464,10 @@ def main():
     server_url = "http://localhost:5000"
     
     args = sys.argv[1:]
+    
+    # Per-update status lines are only shown with --verbose
+    args = configure_logging(args)
+    
     if "--server-gps" in args:
         use_server_gps = True
         # Remove the flag from args
@@ -399,6 +521,7 @@ def main():
                 destination = nav_system.get_destination_by_voice()
                 if not destination:
                     print("❌ Could not get destination from voice input")
+                    nav_system.stop_tts()
                     return
                 print(f"📍 Destination set to: {destination}")
                 break
@@ -406,7 +529,10 @@ def main():
                 print("❌ Please enter 1 or 2")
     
     # Run navigation
-    nav_system.run_live_navigation(destination)
+    try:
+        nav_system.run_live_navigation(destination)
+    finally:
+        nav_system.stop_tts()
 
 
 if __name__ == "__main__":
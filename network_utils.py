@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Network Utilities
+Small helpers shared by the navigation, GPS and setup scripts
+"""
+
+import functools
+import logging
+import socket
+from typing import List
+
+
+@functools.lru_cache(maxsize=1)
+def get_local_ip():
+    """Get the local IP address of this device (looked up once per process)"""
+    try:
+        # Connecting a UDP socket only picks the outgoing interface; no packets
+        # are sent. The timeout keeps it from hanging on a badly configured network.
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.settimeout(0.2)
+            s.connect(("8.8.8.8", 80))
+            return s.getsockname()[0]
+    except OSError:
+        return "localhost"
+
+
+def configure_logging(args: List[str]) -> List[str]:
+    """
+    Set up logging for a command-line script: INFO with --verbose, so
+    per-update status lines are shown, and WARNING otherwise
+    
+    Args:
+        args: Command-line arguments (without the script name)
+        
+    Returns:
+        List[str]: The arguments with --verbose removed
+    """
+    verbose = "--verbose" in args
+    logging.basicConfig(level=logging.INFO if verbose else logging.WARNING, format="%(message)s")
+    return [arg for arg in args if arg != "--verbose"]
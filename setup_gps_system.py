@@ -4,37 +4,150 @@ GPS System Setup Helper
 Helps set up the computer-to-Raspberry Pi GPS system
 """
 
-import subprocess
+import os
 import sys
-import time
+import textwrap
+import importlib.util
 import requests
 from typing import Optional
+import threading
+from concurrent.futures import Future
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from network_utils import get_local_ip
 
+REQUIRED_PACKAGES = ['requests', 'geocoder', 'flask', 'pyttsx3', 'pyaudio', 'SpeechRecognition']
+
+# Distribution name -> import name, where they differ
+IMPORT_NAMES = {'SpeechRecognition': 'speech_recognition'}
+
+RULE = "=" * 60
+
+# Instruction blocks, each printed with a single call
+INTRO_TEXT = textwrap.dedent("""
+    {rule}
+    🚀 GPS SYSTEM SETUP
+    {rule}
+
+    This script helps set up the computer-to-Raspberry Pi GPS system.
+
+    Setup involves:
+    1. Computer: Run gps_sender.py to send GPS coordinates
+    2. Raspberry Pi: Run gps_server.py to receive coordinates
+    3. Raspberry Pi: Run main.py --server-gps for navigation
+
+    {rule}
+    STEP 1: CHECK DEPENDENCIES
+    {rule}""").format(rule=RULE)
+
+ROLE_TEXT = textwrap.dedent("""
+    {rule}
+    STEP 2: CHOOSE YOUR ROLE
+    {rule}
+
+    Are you setting up:
+    1. Computer (sends GPS coordinates)
+    2. Raspberry Pi (receives GPS and runs navigation)""").format(rule=RULE)
+
+# The two static blocks above, encoded once for writing straight to stdout
+INTRO_BYTES = (INTRO_TEXT + "\n").encode("utf-8")
+ROLE_BYTES = (ROLE_TEXT + "\n").encode("utf-8")
+
+COMPUTER_SETUP_TEXT = textwrap.dedent("""
+    {rule}
+    🖥️  COMPUTER SETUP
+    {rule}
+
+    📍 Your computer's IP: {ip}
+
+    To send GPS coordinates from your computer:
+
+    1. Make sure the Raspberry Pi GPS server is running
+    2. Get the Raspberry Pi's IP address (it will be shown when you start the server)
+    3. Run the GPS sender:
+       python gps_sender.py http://RASPBERRY_PI_IP:5000
+
+       Example:
+       python gps_sender.py http://192.168.1.100:5000
+
+    📝 Notes:
+    - The script will open a browser to get your GPS location
+    - Allow location access when prompted
+    - The script will continuously send your location to the server
+    - Press Ctrl+C to stop
+    - Make sure both devices are on the same network""")
+
+RASPBERRY_PI_SETUP_TEXT = textwrap.dedent("""
+    {rule}
+    🍓 RASPBERRY PI SETUP
+    {rule}
+
+    📍 Your Raspberry Pi's IP: {ip}
+
+    To run the GPS server and navigation on Raspberry Pi:
+
+    1. Start the GPS server (in one terminal):
+       python gps_server.py
+       (The server will show its IP address when it starts)
+
+    2. Start navigation with server GPS (in another terminal):
+       python main.py --server-gps
+
+       Or with custom server URL:
+       python main.py --server-gps --server-url http://{ip}:5000
+
+    📝 Notes:
+    - The server will wait for GPS coordinates from the computer
+    - The navigation will use coordinates from the server
+    - Make sure both are running before starting navigation
+    - Tell the computer to connect to: http://{ip}:5000
+
+    {rule}
+    TESTING CONNECTION
+    {rule}""")
+
+# Shared session so repeated server probes reuse the keep-alive connection
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=2,
+                                      max_retries=Retry(total=1, backoff_factor=0.1)))
+
+
+def print_static(text: str, data: bytes):
+    """
+    Print a static block from its pre-encoded UTF-8 bytes.
+    
+    Writes to the binary stdout buffer, skipping the text layer's encoding.
+    Falls back to print() when stdout has no buffer or isn't UTF-8.
+    
+    Args:
+        text: The block as text, used for the fallback
+        data: The same block (plus trailing newline) encoded as UTF-8
+    """
+    buffer = getattr(sys.stdout, 'buffer', None)
+    encoding = (getattr(sys.stdout, 'encoding', None) or '').lower().replace('-', '')
+    if buffer is None or encoding != 'utf8':
+        print(text)
+        return
+    sys.stdout.flush()  # Keep ordering with text already written
+    buffer.write(data)
+    buffer.flush()
+
+
+def _is_installed(package):
+    """Check whether a package is importable without executing its __init__"""
+    return importlib.util.find_spec(IMPORT_NAMES.get(package, package)) is not None
 
-def get_local_ip():
-    """Get the local IP address of this device"""
-    import socket
-    try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        local_ip = s.getsockname()[0]
-        s.close()
-        return local_ip
-    except:
-        return "localhost"
 
 def check_dependencies():
     """Check if required dependencies are installed"""
     print("🔍 Checking dependencies...")
     
-    required_packages = ['requests', 'geocoder', 'flask', 'pyttsx3', 'pyaudio', 'SpeechRecognition']
     missing_packages = []
     
-    for package in required_packages:
-        try:
-            __import__(package)
+    for package in REQUIRED_PACKAGES:
+        if _is_installed(package):
             print(f"✅ {package}")
-        except ImportError:
+        else:
             print(f"❌ {package} - MISSING")
             missing_packages.append(package)
     
@@ -47,10 +160,85 @@ def check_dependencies():
     return True
 
 
-def test_server_connection(server_url: str = "http://localhost:5000") -> bool:
-    """Test connection to GPS server"""
+def read_choice(prompt: str) -> str:
+    """
+    Read a single menu choice, returning as soon as a key is pressed.
+    
+    Falls back to a line-based input() when stdin is not a terminal or the
+    platform has no termios (Windows).
+    
+    Args:
+        prompt: Text shown before reading the key
+        
+    Returns:
+        str: The key pressed (or the line entered), stripped
+    """
+    if not sys.stdin.isatty():
+        return input(prompt).strip()
     try:
-        response = requests.get(f"{server_url}/status", timeout=5)
+        import termios
+        import tty
+    except ImportError:
+        return input(prompt).strip()
+    
+    fd = sys.stdin.fileno()
+    old_settings = termios.tcgetattr(fd)
+    print(prompt, end="", flush=True)
+    try:
+        # cbreak delivers keys immediately but keeps Ctrl+C working. Read the
+        # fd directly so nothing is left behind in sys.stdin's own buffer
+        tty.setcbreak(fd)
+        key = os.read(fd, 1).decode('utf-8', errors='replace')
+    finally:
+        # TCSAFLUSH discards anything typed after the key (e.g. a habitual
+        # Enter), so it doesn't answer the next input() prompt
+        termios.tcsetattr(fd, termios.TCSAFLUSH, old_settings)
+    # Stdin closed, or Ctrl+D (which cbreak passes through as a raw byte)
+    if key in ('', '\x04'):
+        raise EOFError
+    print(key)
+    return key.strip()
+
+
+def probe_status_in_background(server_url: str) -> Future:
+    """
+    Start fetching {server_url}/status on a daemon thread
+    
+    A daemon thread (rather than an executor) so an unwanted probe never
+    delays the script's exit.
+    
+    Args:
+        server_url: URL of the GPS server
+        
+    Returns:
+        Future: Resolves to the response, or to the request's exception
+    """
+    probe = Future()
+    
+    def run():
+        try:
+            probe.set_result(_session.get(f"{server_url}/status", timeout=5))
+        except Exception as e:
+            probe.set_exception(e)
+    
+    threading.Thread(target=run, daemon=True).start()
+    return probe
+
+
+def test_server_connection(server_url: str = "http://localhost:5000", status_probe: Optional[Future] = None) -> bool:
+    """
+    Test connection to GPS server
+    
+    Args:
+        server_url: URL of the GPS server
+        status_probe: Optional future already fetching {server_url}/status;
+                      its response is used instead of making a new request
+    """
+    try:
+        if status_probe is not None:
+            response = status_probe.result()
+        else:
+            response = _session.get(f"{server_url}/status", timeout=5)
         if response.status_code == 200:
             data = response.json()
             print(f"✅ Server is running")
@@ -71,117 +259,79 @@ def test_server_connection(server_url: str = "http://localhost:5000") -> bool:
 
 def main():
     """Main setup function"""
-    print("\n" + "="*60)
-    print("🚀 GPS SYSTEM SETUP")
-    print("="*60 + "\n")
-    
-    print("This script helps set up the computer-to-Raspberry Pi GPS system.")
-    print("\nSetup involves:")
-    print("1. Computer: Run gps_sender.py to send GPS coordinates")
-    print("2. Raspberry Pi: Run gps_server.py to receive coordinates")
-    print("3. Raspberry Pi: Run main.py --server-gps for navigation")
-    
-    print("\n" + "="*60)
-    print("STEP 1: CHECK DEPENDENCIES")
-    print("="*60)
+    print_static(INTRO_TEXT, INTRO_BYTES)
     
     if not check_dependencies():
         print("\n❌ Please install missing dependencies first")
         return
     
-    print("\n" + "="*60)
-    print("STEP 2: CHOOSE YOUR ROLE")
-    print("="*60)
+    print_static(ROLE_TEXT, ROLE_BYTES)
     
-    print("\nAre you setting up:")
-    print("1. Computer (sends GPS coordinates)")
-    print("2. Raspberry Pi (receives GPS and runs navigation)")
+    current_ip = get_local_ip()
     
     while True:
-        choice = input("\nEnter choice (1 or 2): ").strip()
-        if choice == "1":
-            setup_computer()
-            break
-        elif choice == "2":
-            setup_raspberry_pi()
+        choice = read_choice("\nPress 1 or 2: ")
+        handler = SETUP_HANDLERS.get(choice)
+        if handler:
+            handler(current_ip)
             break
-        else:
-            print("❌ Please enter 1 or 2")
+        print("❌ Please press 1 or 2")
 
 
-def setup_computer():
-    """Setup instructions for computer"""
-    print("\n" + "="*60)
-    print("🖥️  COMPUTER SETUP")
-    print("="*60)
+def setup_computer(current_ip: str):
+    """
+    Setup instructions for computer
     
-    # Get current device IP
-    current_ip = get_local_ip()
+    Args:
+        current_ip: This device's local IP address
+    """
+    print(COMPUTER_SETUP_TEXT.format(rule=RULE, ip=current_ip))
+
+
+def setup_raspberry_pi(current_ip: str):
+    """
+    Setup instructions for Raspberry Pi
     
-    print(f"\n📍 Your computer's IP: {current_ip}")
-    print("\nTo send GPS coordinates from your computer:")
-    print("\n1. Make sure the Raspberry Pi GPS server is running")
-    print("2. Get the Raspberry Pi's IP address (it will be shown when you start the server)")
-    print("3. Run the GPS sender:")
-    print("   python gps_sender.py http://RASPBERRY_PI_IP:5000")
-    print("\n   Example:")
-    print("   python gps_sender.py http://192.168.1.100:5000")
-    
-    print("\n📝 Notes:")
-    print("- The script will open a browser to get your GPS location")
-    print("- Allow location access when prompted")
-    print("- The script will continuously send your location to the server")
-    print("- Press Ctrl+C to stop")
-    print(f"- Make sure both devices are on the same network")
-
-
-def setup_raspberry_pi():
-    """Setup instructions for Raspberry Pi"""
-    print("\n" + "="*60)
-    print("🍓 RASPBERRY PI SETUP")
-    print("="*60)
-    
-    # Get current device IP
-    current_ip = get_local_ip()
+    Args:
+        current_ip: This device's local IP address
+    """
+    print(RASPBERRY_PI_SETUP_TEXT.format(rule=RULE, ip=current_ip))
+    
+    # Test server connection, probing the default URL while the user reads the prompt
+    default_url = f"http://{current_ip}:5000"
+    default_probe = probe_status_in_background(default_url)
     
-    print(f"\n📍 Your Raspberry Pi's IP: {current_ip}")
-    print("\nTo run the GPS server and navigation on Raspberry Pi:")
-    print("\n1. Start the GPS server (in one terminal):")
-    print("   python gps_server.py")
-    print("   (The server will show its IP address when it starts)")
-    
-    print("\n2. Start navigation with server GPS (in another terminal):")
-    print("   python main.py --server-gps")
-    print("\n   Or with custom server URL:")
-    print(f"   python main.py --server-gps --server-url http://{current_ip}:5000")
-    
-    print("\n📝 Notes:")
-    print("- The server will wait for GPS coordinates from the computer")
-    print("- The navigation will use coordinates from the server")
-    print("- Make sure both are running before starting navigation")
-    print(f"- Tell the computer to connect to: http://{current_ip}:5000")
-    
-    print("\n" + "="*60)
-    print("TESTING CONNECTION")
-    print("="*60)
-    
-    # Test server connection
-    server_url = input(f"\nEnter server URL (default: http://{current_ip}:5000): ").strip()
+    server_url = input(f"\nEnter server URL (default: {default_url}): ").strip()
     if not server_url:
-        server_url = f"http://{current_ip}:5000"
+        server_url = default_url
+    
+    # The early probe is only used for the default URL (for any other URL it
+    # is simply ignored). If it had already failed before the user answered,
+    # the server may have been started since, so send a fresh request;
+    # if it is still running, wait for it rather than probing twice
+    status_probe = None
+    if server_url == default_url and not (default_probe.done() and default_probe.exception() is not None):
+        status_probe = default_probe
     
     print(f"\n🔗 Testing connection to {server_url}...")
-    if test_server_connection(server_url):
+    if test_server_connection(server_url, status_probe):
         print("✅ Server connection successful!")
     else:
         print("❌ Could not connect to server")
         print("Make sure the GPS server is running on the Raspberry Pi")
 
 
+# Role menu choice -> setup function
+SETUP_HANDLERS = {
+    "1": setup_computer,
+    "2": setup_raspberry_pi,
+}
+
+
 if __name__ == "__main__":
     try:
         main()
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, EOFError):
         print("\n\n👋 Setup cancelled by user")
         sys.exit(0)
     except Exception as e:
@@ -5,14 +5,213 @@ A Google Maps alternative that provides turn-by-turn directions via text
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urlsplit
+import os
+import re
 import sys
+import copy
+import sqlite3
 from typing import Dict, List, Tuple, Optional
 import json
 import geocoder
 import time
 import math
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 import platform
 
+# orjson parses the large OSRM responses several times faster; it's optional
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Routine status lines; hidden unless the entry point enables INFO logging
+logger = logging.getLogger('text_maps')
+
+
+# Mean radius of Earth in meters
+EARTH_RADIUS_M = 6371000
+
+# Length of one degree of latitude in meters
+METERS_PER_DEGREE = 111320.0
+
+# Distance from the destination that counts as arrived
+ARRIVAL_RADIUS_M = 20
+
+# Addresses that mean "use my current location" instead of geocoding
+CURRENT_LOCATION_KEYWORDS = frozenset({'current', 'current location', 'my location', 'here'})
+
+# Public geocoding and routing services
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+# Use driving profile but we'll recalculate time for walking
+# Public OSRM server doesn't have foot profile available
+OSRM_ROUTE_URL = "http://router.project-osrm.org/route/v1/driving"
+
+# (connect, read) timeouts in seconds for geocoding and routing requests
+REQUEST_TIMEOUT = (3.05, 10)
+
+# Request headers and the fixed query parameters for Nominatim and OSRM;
+# per-request values are merged in at call time
+REQUEST_HEADERS = {
+    'User-Agent': 'TextMaps/1.0'
+}
+NOMINATIM_PARAMS = {
+    'format': 'json',
+    'limit': 1
+}
+# Nominatim's usage policy allows at most one request per second
+NOMINATIM_MIN_INTERVAL = 1.0
+# Only the steps are used, so skip the route overview geometry and leave
+# the per-step geometry in OSRM's compact default polyline encoding
+OSRM_ROUTE_PARAMS = {
+    'overview': 'false',
+    'steps': 'true'
+}
+
+# How long a geocoding result is reused, and how many are kept. Addresses
+# rarely move, so results are kept for 30 days
+GEOCODE_CACHE_TTL = 30 * 24 * 60 * 60
+GEOCODE_CACHE_SIZE = 1000
+
+# Punctuation that doesn't change what Nominatim finds ("Main St." vs "Main St")
+ADDRESS_PUNCTUATION = re.compile(r'[^\w\s]')
+
+# How long a route is reused, and how many are kept. Endpoints are rounded
+# to ROUTE_CACHE_PRECISION decimal places (~1 m) to form the cache key.
+# Walking routes don't depend on traffic, only on the map, so a day is safe
+ROUTE_CACHE_TTL = 24 * 60 * 60
+ROUTE_CACHE_SIZE = 100
+ROUTE_CACHE_PRECISION = 5
+
+# On-disk copy of the geocode and route caches, so they survive restarts
+CACHE_DB_PATH = os.path.join(os.path.expanduser("~"), ".cache", "text_maps", "cache.sqlite3")
+
+
+# One HTTP session per thread (requests.Session isn't guaranteed thread-safe)
+_thread_local = threading.local()
+
+# Serialises Nominatim requests and spaces them NOMINATIM_MIN_INTERVAL apart
+_nominatim_lock = threading.Lock()
+_nominatim_last_request = 0.0
+
+
+def get_shared_session() -> requests.Session:
+    """
+    Return this thread's HTTP session, creating it on first use.
+    
+    Geocoding, routing, the GPS server and the GPS sender all go through it,
+    so keep-alive connections are reused instead of reconnecting per request.
+    Each thread gets its own session; callers on the same thread share it
+    and must not close it.
+    
+    Returns:
+        requests.Session: The session for the calling thread
+    """
+    session = getattr(_thread_local, 'session', None)
+    if session is None:
+        session = _thread_local.session = _create_session()
+    return session
+
+
+def _create_session() -> requests.Session:
+    """Build an HTTP session with pooled connections and per-host retries"""
+    session = requests.Session()
+    # By default (the GPS server) allow one quick reconnect but no read
+    # retries: a stalled long-poll must not be repeated, since the navigation
+    # loop is waiting on it
+    local_adapter = HTTPAdapter(
+        pool_connections=2,
+        pool_maxsize=4,
+        max_retries=Retry(total=1, connect=1, read=0)
+    )
+    session.mount('http://', local_adapter)
+    session.mount('https://', local_adapter)
+    
+    # The public Nominatim and OSRM APIs get bounded backoff retries when
+    # they are rate limiting (429, honouring Retry-After) or a gateway
+    # hiccups. Only GETs are retried
+    api_adapter = HTTPAdapter(
+        pool_connections=2,
+        pool_maxsize=4,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True
+        )
+    )
+    for url in (NOMINATIM_URL, OSRM_ROUTE_URL):
+        parts = urlsplit(url)
+        session.mount(f"{parts.scheme}://{parts.netloc}/", api_adapter)
+    
+    session.headers.update(REQUEST_HEADERS)
+    return session
+
+
+def parse_json(response: requests.Response):
+    """
+    Decode a JSON response body, with orjson when it is installed
+    
+    Args:
+        response: HTTP response with a JSON body
+        
+    Returns:
+        The decoded JSON value
+    """
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+# Direction icons: by turn modifier, by maneuver type, and for maneuvers
+# whose icon depends on the mode as (walking icon, other modes icon)
+TURN_ICONS = {
+    'left': '←',
+    'right': '→',
+    'sharp left': '↰',
+    'sharp right': '↱',
+    'slight left': '↖',
+    'slight right': '↗',
+    'straight': '↑',
+    'uturn': '↶'
+}
+MANEUVER_ICONS = {
+    'merge': '⤴',
+    'roundabout': '⟲',
+    'fork': '⑂'
+}
+MODE_ICONS = {
+    'depart': ('🚶', '🚗'),
+    'arrive': ('🎯', '🏁')
+}
+
+# Printed instruction templates keyed by OSRM maneuver type
+INSTRUCTION_TEMPLATES = {
+    'depart': "{verb} {modifier} on {road}",
+    'arrive': "Arrive at your destination",
+    'turn': "Turn {modifier} onto {road}",
+    'merge': "Merge {modifier} onto {road}",
+    'roundabout': "At roundabout, take exit {exit} onto {road}",
+    'fork': "At fork, keep {modifier} onto {road}",
+}
+DEFAULT_INSTRUCTION_TEMPLATE = "{action} {modifier} onto {road}"
+
+# Spoken (TTS) step templates keyed by OSRM maneuver type
+SPOKEN_STEP_TEMPLATES = {
+    'depart': "Step {num}. Head {modifier} on {road} for {distance}. ",
+    'arrive': "Step {num}. Arrive at your destination. ",
+    'turn': "Step {num}. Turn {modifier} onto {road} and continue for {distance}. ",
+    'merge': "Step {num}. Merge {modifier} onto {road} for {distance}. ",
+    'roundabout': "Step {num}. At roundabout, take exit {exit} onto {road} for {distance}. ",
+    'fork': "Step {num}. At fork, keep {modifier} onto {road} for {distance}. ",
+}
+DEFAULT_SPOKEN_STEP_TEMPLATE = "Step {num}. {action} {modifier} onto {road} for {distance}. "
+
 
 class TextMaps:
     """Text-based navigation system using OpenStreetMap and OSRM"""
@@ -21,24 +220,123 @@ class TextMaps:
         """
         Initialize TextMaps - Permanently set to walking mode
         """
-        self.nominatim_url = "https://nominatim.openstreetmap.org/search"
+        self.nominatim_url = NOMINATIM_URL
         self.mode = 'walking'
-        
-        # Use driving profile but we'll recalculate time for walking
-        # Public OSRM server doesn't have foot profile available
-        self.osrm_url = "http://router.project-osrm.org/route/v1/driving"
-        self.headers = {
-            'User-Agent': 'TextMaps/1.0'
-        }
+        self.osrm_url = OSRM_ROUTE_URL
+        self.headers = REQUEST_HEADERS
         
         # Average walking speed in meters per second (5 km/h = 1.39 m/s)
         self.walking_speed = 1.39
+        
+        # Timestamp of the last fix received from the GPS server (for long-polling)
+        self.last_server_timestamp = None
+        
+        # (latitude, cos(latitude)) reused by is_within_distance while nearby
+        self._cos_lat_cache = (0.0, 1.0)
+        
+        # Successful geocoding results keyed by normalized address,
+        # stored as (monotonic time cached, (latitude, longitude))
+        self._geocode_cache = {}
+        self._geocode_lock = threading.Lock()
+        # Lookups currently running, so concurrent requests for the same
+        # address wait for the first one instead of querying again
+        self._geocode_in_flight = {}
+        
+        # Walking-adjusted routes keyed by rounded endpoints and mode,
+        # stored as (monotonic time cached, route data)
+        self._route_cache = {}
+        self._route_lock = threading.Lock()
+        
+        # SQLite tier behind the in-memory caches, opened on first use
+        self._db = None
+        self._db_failed = False
+        self._db_lock = threading.Lock()
     
-    def get_current_location_from_browser(self) -> Optional[Tuple[float, float]]:
+    @property
+    def session(self) -> requests.Session:
+        """HTTP session for the calling thread (see get_shared_session)"""
+        return get_shared_session()
+    
+    def _remember(self, cache: Dict, key, value, cached_at: float, max_size: int):
+        """
+        Store a value in an in-memory cache (call with that cache's lock held)
+        
+        Args:
+            cache: The cache dict, mapping key -> (monotonic time cached, value)
+            key: Cache key
+            value: Value to store
+            cached_at: Monotonic time the value was originally fetched
+            max_size: Evict the oldest entry beyond this many
+        """
+        # Make room by dropping the oldest entry (dicts keep insertion order)
+        cache.pop(key, None)
+        if len(cache) >= max_size:
+            del cache[next(iter(cache))]
+        cache[key] = (cached_at, value)
+    
+    def _cache_db(self) -> Optional[sqlite3.Connection]:
+        """Open the on-disk cache on first use (call with self._db_lock held)"""
+        if self._db is None and not self._db_failed:
+            try:
+                os.makedirs(os.path.dirname(CACHE_DB_PATH), exist_ok=True)
+                db = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.execute("CREATE TABLE IF NOT EXISTS geocode (address TEXT PRIMARY KEY, lat REAL, lon REAL, ts REAL)")
+                db.execute("CREATE TABLE IF NOT EXISTS route (key TEXT PRIMARY KEY, json TEXT, ts REAL)")
+                # Drop expired rows so the file doesn't grow forever
+                now = time.time()
+                db.execute("DELETE FROM geocode WHERE ts <= ?", (now - GEOCODE_CACHE_TTL,))
+                db.execute("DELETE FROM route WHERE ts <= ?", (now - ROUTE_CACHE_TTL,))
+                db.commit()
+                self._db = db
+            except (sqlite3.Error, OSError) as e:
+                print(f"⚠️  Disk cache unavailable, continuing without it: {e}")
+                self._db_failed = True
+        return self._db
+    
+    def _load_from_disk(self, query: str, key: str, ttl: float) -> Optional[tuple]:
+        """
+        Read one unexpired row from the on-disk cache
+        
+        Args:
+            query: SELECT taking the key and the oldest acceptable timestamp
+            key: Cache key
+            ttl: Maximum age in seconds
+            
+        Returns:
+            The row, or None on a miss or if the disk cache is unavailable
+        """
+        with self._db_lock:
+            db = self._cache_db()
+            if db is None:
+                return None
+            try:
+                return db.execute(query, (key, time.time() - ttl)).fetchone()
+            except sqlite3.Error:
+                return None
+    
+    def _save_to_disk(self, statement: str, values: tuple):
+        """Write one row to the on-disk cache, ignoring failures"""
+        with self._db_lock:
+            db = self._cache_db()
+            if db is None:
+                return
+            try:
+                db.execute(statement, values)
+                db.commit()
+            except sqlite3.Error:
+                pass
+    
+    def get_current_location_from_browser(self, port: int = 8888, note: Optional[str] = None) -> Optional[Tuple[float, float]]:
         """
         Get precise GPS location using browser-based geolocation API
         Opens a simple web server to get HTML5 geolocation
         
+        Args:
+            port: Local port for the geolocation page
+            note: Optional extra line shown on the page
+        
         Returns:
             Tuple of (latitude, longitude) or None if not found
         """
@@ -47,7 +345,8 @@ class TextMaps:
             import threading
             import urllib.parse
             
-            location_data = {'lat': None, 'lon': None, 'received': False}
+            location_data = {'lat': None, 'lon': None}
+            location_received = threading.Event()
             
             class LocationHandler(BaseHTTPRequestHandler):
                 def log_message(self, format, *args):
@@ -63,6 +362,7 @@ class TextMaps:
                         <body>
                         <h2>📍 Getting your GPS location...</h2>
                         <p id="status">Requesting location permission...</p>
+                        <!-- note -->
                         <script>
                         if (navigator.geolocation) {
                             navigator.geolocation.getCurrentPosition(
@@ -82,6 +382,8 @@ class TextMaps:
                         </body>
                         </html>
                         '''
+                        if note:
+                            html = html.replace('<!-- note -->', f'<p>{note}</p>')
                         self.send_response(200)
                         self.send_header('Content-type', 'text/html')
                         self.end_headers()
@@ -93,56 +395,74 @@ class TextMaps:
                         if 'lat' in params and 'lon' in params:
                             location_data['lat'] = float(params['lat'][0])
                             location_data['lon'] = float(params['lon'][0])
-                            location_data['received'] = True
+                            location_received.set()
                         self.send_response(200)
                         self.end_headers()
             
             # Start server in background
-            server = HTTPServer(('localhost', 8888), LocationHandler)
+            server = HTTPServer(('localhost', port), LocationHandler)
             thread = threading.Thread(target=server.serve_forever)
             thread.daemon = True
             thread.start()
             
             # Open browser
             import webbrowser
-            print("🌐 Opening browser to get your precise GPS location...")
-            print("   Please allow location access when prompted.")
-            webbrowser.open('http://localhost:8888')
+            url = f'http://localhost:{port}'
+            if sys.platform.startswith('linux') and not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')):
+                # No GUI session (e.g. a headless Pi): webbrowser would only
+                # stall probing for browsers, so just show the address
+                print(f"🌐 No display found. Open {url} in a browser on this device")
+                print("   to share your precise GPS location.")
+            else:
+                print("🌐 Opening browser to get your precise GPS location...")
+                print("   Please allow location access when prompted.")
+                # webbrowser.open can block while it probes for a browser,
+                # so launch it in the background and start waiting right away
+                threading.Thread(target=webbrowser.open, args=(url,), daemon=True).start()
             
             # Wait for location (max 30 seconds)
-            for _ in range(60):
-                if location_data['received']:
-                    server.shutdown()
-                    return (location_data['lat'], location_data['lon'])
-                time.sleep(0.5)
-            
+            location_received.wait(timeout=30)
             server.shutdown()
+            
+            if location_received.is_set():
+                return (location_data['lat'], location_data['lon'])
             return None
             
         except Exception as e:
             print(f"⚠️  Error getting browser location: {e}")
             return None
     
-    def get_current_location_from_server(self, server_url: str = "http://localhost:5000") -> Optional[Tuple[float, float]]:
+    def get_current_location_from_server(self, server_url: str = "http://localhost:5000", wait: float = 0) -> Optional[Tuple[float, float]]:
         """
         Get current location from GPS server (for Raspberry Pi setup)
         
         Args:
             server_url: URL of the GPS server
+            wait: If > 0, let the server hold the request for up to this many
+                  seconds until a fix newer than the last one seen arrives
         
         Returns:
             Tuple of (latitude, longitude) or None if not found
         """
         try:
-            response = requests.get(f"{server_url}/location", timeout=5)
+            params = {}
+            if wait > 0 and self.last_server_timestamp is not None:
+                params = {'since': self.last_server_timestamp, 'wait': wait}
+            
+            response = self.session.get(f"{server_url}/location", params=params, timeout=5 + wait)
             
             if response.status_code == 200:
-                data = response.json()
+                data = parse_json(response)
                 lat = data['latitude']
                 lon = data['longitude']
-                age_seconds = data.get('age_seconds', 0)
+                age_seconds = data.get('age_seconds')
+                self.last_server_timestamp = data.get('timestamp')
                 
-                print(f"📍 Got location from server: {lat:.4f}, {lon:.4f} (age: {age_seconds:.1f}s)")
+                if logger.isEnabledFor(logging.INFO):
+                    # The server reports age_seconds as null when it has no update
+                    # time, which would break the :.1f format and discard the fix
+                    age_text = f"{age_seconds:.1f}s" if isinstance(age_seconds, (int, float)) else "unknown"
+                    logger.info("📍 Got location from server: %.4f, %.4f (age: %s)", lat, lon, age_text)
                 
                 # Check if location is fresh (less than 30 seconds old)
                 if age_seconds and age_seconds > 30:
@@ -160,7 +480,7 @@ class TextMaps:
             print(f"⚠️  Error getting location from server: {e}")
             return None
 
-    def get_current_location(self, use_gps: bool = True, use_server: bool = False, server_url: str = "http://localhost:5000") -> Optional[Tuple[float, float]]:
+    def get_current_location(self, use_gps: bool = True, use_server: bool = False, server_url: str = "http://localhost:5000", wait: float = 0) -> Optional[Tuple[float, float]]:
         """
         Get current location using GPS, server, or IP-based geolocation
         
@@ -168,6 +488,7 @@ class TextMaps:
             use_gps: If True, try to use device GPS first
             use_server: If True, try to get location from GPS server first
             server_url: URL of the GPS server (if use_server is True)
+            wait: Seconds to long-poll the GPS server for a newer fix (if use_server is True)
         
         Returns:
             Tuple of (latitude, longitude) or None if not found
@@ -175,7 +496,7 @@ class TextMaps:
         try:
             if use_server:
                 # Try server-based GPS (for Raspberry Pi setup)
-                location = self.get_current_location_from_server(server_url)
+                location = self.get_current_location_from_server(server_url, wait=wait)
                 if location:
                     return location
             
@@ -206,21 +527,77 @@ class TextMaps:
         Returns:
             Tuple of (latitude, longitude) or None if not found
         """
-        params = {
-            'q': address,
-            'format': 'json',
-            'limit': 1
-        }
+        # Same address in different case/spacing/punctuation -> same lookup
+        cache_key = ' '.join(ADDRESS_PUNCTUATION.sub(' ', address.lower()).split())
+        with self._geocode_lock:
+            cached = self._geocode_cache.get(cache_key)
+            if cached and time.monotonic() - cached[0] < GEOCODE_CACHE_TTL:
+                return cached[1]
+            
+            # If this address is already being looked up, share that request
+            pending = self._geocode_in_flight.get(cache_key)
+            is_owner = pending is None
+            if is_owner:
+                pending = self._geocode_in_flight[cache_key] = Future()
         
+        if not is_owner:
+            return pending.result()
+        
+        coords = None
         try:
-            response = requests.get(
-                self.nominatim_url,
-                params=params,
-                headers=self.headers,
-                timeout=10
+            row = self._load_from_disk(
+                "SELECT lat, lon, ts FROM geocode WHERE address = ? AND ts > ?",
+                cache_key, GEOCODE_CACHE_TTL
             )
+            if row:
+                coords = (row[0], row[1])
+                cached_at = time.monotonic() - (time.time() - row[2])
+            else:
+                coords = self._request_geocode(address)
+                cached_at = time.monotonic()
+                if coords:
+                    self._save_to_disk(
+                        "INSERT OR REPLACE INTO geocode (address, lat, lon, ts) VALUES (?, ?, ?, ?)",
+                        (cache_key, coords[0], coords[1], time.time())
+                    )
+            
+            if coords:
+                with self._geocode_lock:
+                    self._remember(self._geocode_cache, cache_key, coords, cached_at, GEOCODE_CACHE_SIZE)
+            return coords
+        finally:
+            with self._geocode_lock:
+                del self._geocode_in_flight[cache_key]
+            pending.set_result(coords)
+    
+    def _request_geocode(self, address: str) -> Optional[Tuple[float, float]]:
+        """
+        Look an address up with Nominatim (uncached; use geocode())
+        
+        Args:
+            address: Street address or place name
+            
+        Returns:
+            Tuple of (latitude, longitude) or None if not found
+        """
+        global _nominatim_last_request
+        try:
+            with _nominatim_lock:
+                # Nominatim allows one request per second, across all threads
+                delay = _nominatim_last_request + NOMINATIM_MIN_INTERVAL - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                try:
+                    response = self.session.get(
+                        self.nominatim_url,
+                        params={**NOMINATIM_PARAMS, 'q': address},
+                        headers=self.headers,
+                        timeout=REQUEST_TIMEOUT
+                    )
+                finally:
+                    _nominatim_last_request = time.monotonic()
             response.raise_for_status()
-            results = response.json()
+            results = parse_json(response)
             
             if results:
                 lat = float(results[0]['lat'])
@@ -257,33 +634,60 @@ class TextMaps:
         Returns:
             Route data dictionary or None if route not found
         """
+        # Nearly identical endpoints (within about a metre) reuse the same route
+        cache_key = (
+            round(start_coords[0], ROUTE_CACHE_PRECISION), round(start_coords[1], ROUTE_CACHE_PRECISION),
+            round(end_coords[0], ROUTE_CACHE_PRECISION), round(end_coords[1], ROUTE_CACHE_PRECISION),
+            self.mode
+        )
+        with self._route_lock:
+            cached = self._route_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < ROUTE_CACHE_TTL:
+            # Callers may modify the route, so hand out a copy
+            return copy.deepcopy(cached[1])
+        
+        row = self._load_from_disk(
+            "SELECT json, ts FROM route WHERE key = ? AND ts > ?",
+            repr(cache_key), ROUTE_CACHE_TTL
+        )
+        if row:
+            data = json.loads(row[0])
+            with self._route_lock:
+                self._remember(self._route_cache, cache_key, data,
+                               time.monotonic() - (time.time() - row[1]), ROUTE_CACHE_SIZE)
+            return copy.deepcopy(data)
+        
         # OSRM uses lon,lat format (opposite of typical lat,lon)
         start_lon, start_lat = start_coords[1], start_coords[0]
         end_lon, end_lat = end_coords[1], end_coords[0]
         
         url = f"{self.osrm_url}/{start_lon},{start_lat};{end_lon},{end_lat}"
-        params = {
-            'overview': 'full',
-            'steps': 'true',
-            'geometries': 'geojson'
-        }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(url, params=OSRM_ROUTE_PARAMS, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
-            data = response.json()
+            data = parse_json(response)
             
             if data['code'] == 'Ok':
-                # Recalculate duration for walking speed
+                # Recalculate duration for walking speed (method looked up once,
+                # not per step)
+                walking_time = self.calculate_walking_time
                 for route in data['routes']:
-                    distance = route['distance']
-                    route['duration'] = self.calculate_walking_time(distance)
+                    route['duration'] = walking_time(route['distance'])
                     
                     # Also update duration for each leg and step
                     for leg in route['legs']:
-                        leg['duration'] = self.calculate_walking_time(leg['distance'])
+                        leg['duration'] = walking_time(leg['distance'])
                         for step in leg['steps']:
-                            step['duration'] = self.calculate_walking_time(step['distance'])
+                            step['duration'] = walking_time(step['distance'])
+                
+                with self._route_lock:
+                    self._remember(self._route_cache, cache_key, copy.deepcopy(data),
+                                   time.monotonic(), ROUTE_CACHE_SIZE)
+                self._save_to_disk(
+                    "INSERT OR REPLACE INTO route (key, json, ts) VALUES (?, ?, ?)",
+                    (repr(cache_key), json.dumps(data), time.time())
+                )
                 
                 return data
             else:
@@ -314,28 +718,15 @@ class TextMaps:
     
     def get_direction_icon(self, modifier: str, direction_type: str) -> str:
         """Get a text icon for the direction"""
-        icons = {
-            'turn': {
-                'left': '←',
-                'right': '→',
-                'sharp left': '↰',
-                'sharp right': '↱',
-                'slight left': '↖',
-                'slight right': '↗',
-                'straight': '↑',
-                'uturn': '↶'
-            },
-            'depart': '🚶' if self.mode == 'walking' else '🚗',
-            'arrive': '🎯' if self.mode == 'walking' else '🏁',
-            'merge': '⤴',
-            'roundabout': '⟲',
-            'fork': '⑂'
-        }
-        
-        if direction_type in ['depart', 'arrive', 'merge', 'roundabout', 'fork']:
-            return icons.get(direction_type, '→')
-        
-        return icons.get('turn', {}).get(modifier, '→')
+        if direction_type in MODE_ICONS:
+            walking_icon, other_icon = MODE_ICONS[direction_type]
+            return walking_icon if self.mode == 'walking' else other_icon
+        
+        icon = MANEUVER_ICONS.get(direction_type)
+        if icon:
+            return icon
+        
+        return TURN_ICONS.get(modifier, '→')
     
     def format_instruction(self, step: Dict, step_num: int) -> str:
         """Format a single navigation instruction"""
@@ -353,71 +744,105 @@ class TextMaps:
         # Format the step with walking-friendly language
         action_verb = "Walk" if self.mode == 'walking' else "Head"
         
-        if direction_type == 'depart':
-            text = f"{action_verb} {modifier} on {instruction}"
-        elif direction_type == 'arrive':
-            text = f"Arrive at your destination"
-        elif direction_type == 'turn':
-            text = f"Turn {modifier} onto {instruction}"
-        elif direction_type == 'merge':
-            text = f"Merge {modifier} onto {instruction}"
-        elif direction_type == 'roundabout':
-            exit_num = maneuver.get('exit', 1)
-            text = f"At roundabout, take exit {exit_num} onto {instruction}"
-        elif direction_type == 'fork':
-            text = f"At fork, keep {modifier} onto {instruction}"
-        else:
-            text = f"{direction_type.replace('_', ' ').title()} {modifier} onto {instruction}"
+        template = INSTRUCTION_TEMPLATES.get(direction_type, DEFAULT_INSTRUCTION_TEMPLATE)
+        text = template.format(
+            verb=action_verb,
+            modifier=modifier,
+            road=instruction,
+            exit=maneuver.get('exit', 1),
+            action=direction_type.replace('_', ' ').title()
+        )
         
         # Add distance
         dist_text = self.format_distance(distance)
         
         return f"{step_num}. {icon} {text} ({dist_text})"
     
-    def get_directions_text(self, start_address: str, end_address: str) -> Optional[str]:
+    def is_current_location(self, address: str) -> bool:
+        """Check whether an address is one of the 'current location' keywords"""
+        return address.lower() in CURRENT_LOCATION_KEYWORDS
+    
+    def _resolve_location(self, address: str, label: str) -> Optional[Tuple[float, float]]:
         """
-        Get turn-by-turn directions as text (for TTS)
+        Resolve one end of a trip to coordinates
         
         Args:
-            start_address: Starting location (or "current" for current location)
-            end_address: Destination (or "current" for current location)
+            address: Address, place name, or a 'current location' keyword
+            label: How to describe this end in error messages
             
         Returns:
-            String containing all directions, or None if error
+            Tuple of (latitude, longitude) or None if not found
         """
-        # Geocode addresses
-        print("🔍 Finding locations...")
-        
-        # Handle current location for start
-        if start_address.lower() in ['current', 'current location', 'my location', 'here']:
+        if self.is_current_location(address):
             print("📍 Detecting your current location...")
-            start_coords = self.get_current_location()
-            if not start_coords:
+            coords = self.get_current_location()
+            if not coords:
                 print(f"❌ Could not detect current location. Please enter an address instead.")
                 return None
             print(f"✓ Current location detected!")
-        else:
-            start_coords = self.geocode(start_address)
-            if not start_coords:
-                print(f"❌ Could not find starting location: {start_address}")
-                return None
+            return coords
         
-        # Handle current location for destination
-        if end_address.lower() in ['current', 'current location', 'my location', 'here']:
-            print("📍 Detecting your current location...")
-            end_coords = self.get_current_location()
-            if not end_coords:
-                print(f"❌ Could not detect current location. Please enter an address instead.")
-                return None
-            print(f"✓ Current location detected!")
+        coords = self.geocode(address)
+        if not coords:
+            print(f"❌ Could not find {label}: {address}")
+        return coords
+    
+    def resolve_endpoints(self, start_address: str, end_address: str) -> Optional[Tuple[Tuple[float, float], Tuple[float, float]]]:
+        """
+        Resolve the start and destination to coordinates, detecting the
+        current location alongside the geocoding where possible
+        
+        Args:
+            start_address: Starting location (or "current" for current location)
+            end_address: Destination (or "current" for current location)
+            
+        Returns:
+            Tuple of (start_coords, end_coords) or None if either was not found
+        """
+        print("🔍 Finding locations...")
+        
+        start_is_current = self.is_current_location(start_address)
+        end_is_current = self.is_current_location(end_address)
+        
+        if start_is_current and end_is_current:
+            # Detect the current location once rather than opening two browser pages
+            start_coords = end_coords = self._resolve_location(start_address, "starting location")
+        elif start_is_current or end_is_current:
+            # Detecting the current location and geocoding the other end are
+            # independent, so run them side by side
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                start_future = executor.submit(self._resolve_location, start_address, "starting location")
+                end_future = executor.submit(self._resolve_location, end_address, "destination")
+                start_coords = start_future.result()
+                end_coords = end_future.result()
         else:
-            end_coords = self.geocode(end_address)
-            if not end_coords:
-                print(f"❌ Could not find destination: {end_address}")
-                return None
+            # Two addresses: Nominatim allows one request per second, so
+            # there's nothing to gain from looking them up at once
+            start_coords = self._resolve_location(start_address, "starting location")
+            end_coords = self._resolve_location(end_address, "destination")
+        
+        if not start_coords or not end_coords:
+            return None
         
         print(f"✓ Start: {start_coords[0]:.4f}, {start_coords[1]:.4f}")
         print(f"✓ End: {end_coords[0]:.4f}, {end_coords[1]:.4f}\n")
+        return start_coords, end_coords
+    
+    def get_directions_text(self, start_address: str, end_address: str) -> Optional[str]:
+        """
+        Get turn-by-turn directions as text (for TTS)
+        
+        Args:
+            start_address: Starting location (or "current" for current location)
+            end_address: Destination (or "current" for current location)
+            
+        Returns:
+            String containing all directions, or None if error
+        """
+        start_end = self.resolve_endpoints(start_address, end_address)
+        if not start_end:
+            return None
+        start_coords, end_coords = start_end
         
         # Get route
         print("🗺️  Calculating route...\n")
@@ -447,21 +872,15 @@ class TextMaps:
             instruction = step.get('name', 'the road')
             
             # Format for speech (no icons)
-            if direction_type == 'depart':
-                text = f"Step {i}. Head {modifier} on {instruction} for {self.format_distance(distance)}. "
-            elif direction_type == 'arrive':
-                text = f"Step {i}. Arrive at your destination. "
-            elif direction_type == 'turn':
-                text = f"Step {i}. Turn {modifier} onto {instruction} and continue for {self.format_distance(distance)}. "
-            elif direction_type == 'merge':
-                text = f"Step {i}. Merge {modifier} onto {instruction} for {self.format_distance(distance)}. "
-            elif direction_type == 'roundabout':
-                exit_num = maneuver.get('exit', 1)
-                text = f"Step {i}. At roundabout, take exit {exit_num} onto {instruction} for {self.format_distance(distance)}. "
-            elif direction_type == 'fork':
-                text = f"Step {i}. At fork, keep {modifier} onto {instruction} for {self.format_distance(distance)}. "
-            else:
-                text = f"Step {i}. {direction_type.replace('_', ' ').title()} {modifier} onto {instruction} for {self.format_distance(distance)}. "
+            template = SPOKEN_STEP_TEMPLATES.get(direction_type, DEFAULT_SPOKEN_STEP_TEMPLATE)
+            text = template.format(
+                num=i,
+                modifier=modifier,
+                road=instruction,
+                distance=self.format_distance(distance),
+                exit=maneuver.get('exit', 1),
+                action=direction_type.replace('_', ' ').title()
+            )
             
             directions_text += text
         
@@ -484,39 +903,10 @@ class TextMaps:
         print(f"  📍 {end_address}")
         print(f"{'='*60}\n")
         
-        # Geocode addresses
-        print("🔍 Finding locations...")
-        
-        # Handle current location for start
-        if start_address.lower() in ['current', 'current location', 'my location', 'here']:
-            print("📍 Detecting your current location...")
-            start_coords = self.get_current_location()
-            if not start_coords:
-                print(f"❌ Could not detect current location. Please enter an address instead.")
-                return
-            print(f"✓ Current location detected!")
-        else:
-            start_coords = self.geocode(start_address)
-            if not start_coords:
-                print(f"❌ Could not find starting location: {start_address}")
-                return
-        
-        # Handle current location for destination
-        if end_address.lower() in ['current', 'current location', 'my location', 'here']:
-            print("📍 Detecting your current location...")
-            end_coords = self.get_current_location()
-            if not end_coords:
-                print(f"❌ Could not detect current location. Please enter an address instead.")
-                return
-            print(f"✓ Current location detected!")
-        else:
-            end_coords = self.geocode(end_address)
-            if not end_coords:
-                print(f"❌ Could not find destination: {end_address}")
-                return
-        
-        print(f"✓ Start: {start_coords[0]:.4f}, {start_coords[1]:.4f}")
-        print(f"✓ End: {end_coords[0]:.4f}, {end_coords[1]:.4f}\n")
+        start_end = self.resolve_endpoints(start_address, end_address)
+        if not start_end:
+            return
+        start_coords, end_coords = start_end
         
         # Get route
         print("🗺️  Calculating route...\n")
@@ -567,47 +957,90 @@ class TextMaps:
         lat1, lon1 = coord1
         lat2, lon2 = coord2
         
-        # Radius of Earth in meters
-        R = 6371000
-        
         # Convert to radians
         phi1 = math.radians(lat1)
         phi2 = math.radians(lat2)
         delta_phi = math.radians(lat2 - lat1)
         delta_lambda = math.radians(lon2 - lon1)
         
-        # Haversine formula
+        # Haversine formula (asin form: one sqrt, no atan2)
         a = math.sin(delta_phi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda/2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
         
-        return R * c
+        return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+    
+    def is_within_distance(self, coord1: Tuple[float, float], coord2: Tuple[float, float], meters: float) -> bool:
+        """
+        Check whether two coordinates are within a distance of each other
+        
+        Uses an equirectangular approximation compared in squared meters, which
+        is accurate at the short distances this is used for and avoids the
+        haversine's trig calls.
+        
+        Args:
+            coord1: (latitude, longitude) of first point
+            coord2: (latitude, longitude) of second point
+            meters: Distance threshold in meters
+            
+        Returns:
+            True if the points are closer than `meters`
+        """
+        lat1, lon1 = coord1
+        lat2, lon2 = coord2
+        
+        # cos(latitude) barely changes over ~1 km, so only recompute it when we've moved
+        cached_lat, cos_lat = self._cos_lat_cache
+        if abs(lat1 - cached_lat) > 0.01:
+            cos_lat = math.cos(math.radians(lat1))
+            self._cos_lat_cache = (lat1, cos_lat)
+        
+        dy = (lat2 - lat1) * METERS_PER_DEGREE
+        dx = (lon2 - lon1) * METERS_PER_DEGREE * cos_lat
+        
+        return dx * dx + dy * dy < meters * meters
+    
+    def get_step_coords(self, steps: List[Dict]) -> List[Tuple[float, float]]:
+        """
+        Get the maneuver location of every step, computed once per route
+        
+        Args:
+            steps: List of route steps
+            
+        Returns:
+            List of (latitude, longitude) tuples, one per step
+        """
+        # OSRM uses lon,lat -> convert to lat,lon
+        return [(step['maneuver']['location'][1], step['maneuver']['location'][0]) for step in steps]
     
-    def find_current_step(self, current_location: Tuple[float, float], steps: List[Dict]) -> int:
+    def find_current_step(self, current_location: Tuple[float, float], steps: List[Dict],
+                          step_coords: Optional[List[Tuple[float, float]]] = None) -> int:
         """
         Find which step the user is currently on based on their location
         
         Args:
             current_location: (latitude, longitude) of current position
             steps: List of route steps
+            step_coords: Precomputed maneuver locations from get_step_coords()
             
         Returns:
             Index of the current step
         """
-        min_distance = float('inf')
-        current_step_idx = 0
+        if step_coords is None:
+            step_coords = self.get_step_coords(steps)
         
-        for i, step in enumerate(steps):
-            # Get the maneuver location for this step
-            maneuver_location = step['maneuver']['location']
-            step_coords = (maneuver_location[1], maneuver_location[0])  # lon,lat -> lat,lon
-            
-            distance = self.calculate_distance(current_location, step_coords)
-            
-            if distance < min_distance:
-                min_distance = distance
-                current_step_idx = i
+        if not step_coords:
+            return 0
         
-        return current_step_idx
+        current_lat, current_lon = current_location
+        cos_lat = math.cos(math.radians(current_lat))
+        
+        # Nearest maneuver by squared equirectangular distance: over the span of
+        # a route it ranks steps the same as the haversine, with no trig per step
+        def distance_sq(i):
+            dlat = step_coords[i][0] - current_lat
+            dlon = (step_coords[i][1] - current_lon) * cos_lat
+            return dlat * dlat + dlon * dlon
+        
+        return min(range(len(step_coords)), key=distance_sq)
     
     def live_navigation(self, destination: str, update_interval: int = 5):
         """
@@ -652,13 +1085,15 @@ class TextMaps:
         
         route = route_data['routes'][0]
         steps = route['legs'][0]['steps']
+        step_coords = self.get_step_coords(steps)
+        num_steps = len(steps)
         total_distance = route['distance']
         
         print(f"{'='*60}")
         print(f"📊 ROUTE OVERVIEW")
         print(f"{'='*60}")
         print(f"Total Distance: {self.format_distance(total_distance)}")
-        print(f"Total Steps: {len(steps)}")
+        print(f"Total Steps: {num_steps}")
         print(f"{'='*60}\n")
         
         print("🚶 Starting live navigation...")
@@ -670,7 +1105,7 @@ class TextMaps:
         
         try:
             iteration = 0
-            while current_step_idx < len(steps):
+            while current_step_idx < num_steps:
                 iteration += 1
                 
                 # Get fresh GPS location on each update
@@ -681,38 +1116,36 @@ class TextMaps:
                     time.sleep(update_interval)
                     continue
                 
-                # Calculate distance to destination
-                distance_to_dest = self.calculate_distance(current_location, dest_coords)
-                
                 # Check if we've arrived (within 20 meters)
-                if distance_to_dest < 20:
+                if self.is_within_distance(current_location, dest_coords, ARRIVAL_RADIUS_M):
                     print("\n" + "="*60)
                     print("🎯 YOU HAVE ARRIVED AT YOUR DESTINATION!")
                     print("="*60 + "\n")
                     break
                 
+                # Calculate distance to destination
+                distance_to_dest = self.calculate_distance(current_location, dest_coords)
+                
                 # Find current step based on location
-                current_step_idx = self.find_current_step(current_location, steps)
+                current_step_idx = self.find_current_step(current_location, steps, step_coords)
                 
                 # Display current status (always show, not just on step change)
                 step = steps[current_step_idx]
                 instruction = self.format_instruction(step, current_step_idx + 1)
                 
                 # Calculate distance to next maneuver
-                maneuver_location = step['maneuver']['location']
-                maneuver_coords = (maneuver_location[1], maneuver_location[0])
-                distance_to_maneuver = self.calculate_distance(current_location, maneuver_coords)
+                distance_to_maneuver = self.calculate_distance(current_location, step_coords[current_step_idx])
                 
                 # Clear screen for better readability (optional)
                 print("\n" + "="*60)
                 print(f"📍 Current Position: {current_location[0]:.4f}, {current_location[1]:.4f}")
                 print(f"📏 Distance to destination: {self.format_distance(distance_to_dest)}")
                 print(f"📏 Distance to next turn: {self.format_distance(distance_to_maneuver)}")
-                print(f"\n🧭 CURRENT INSTRUCTION (Step {current_step_idx + 1}/{len(steps)}):")
+                print(f"\n🧭 CURRENT INSTRUCTION (Step {current_step_idx + 1}/{num_steps}):")
                 print(instruction)
                 
                 # Show next instruction if available
-                if current_step_idx + 1 < len(steps):
+                if current_step_idx + 1 < num_steps:
                     next_step = steps[current_step_idx + 1]
                     next_instruction = self.format_instruction(next_step, current_step_idx + 2)
                     print(f"\n⏭️  NEXT:")